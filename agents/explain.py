@@ -167,26 +167,28 @@ class ExplainAgent:
         Returns:
             str — готовый промпт для отправки в GigaChat через LangChain
         """
-        prompt = f"""Ты — опытный тьютор, который помогает студентам учиться на их ошибках.  
-
-        ЗАДАЧА:  
-        1. Объясни кратко, но так, чтобы было понятно (2-3 предложения), почему ответ пользователя неправильный. Там, где надо, используй термины, чтобы они были уместны.  
-        2. Придумай абсурдный, веселый и запоминающийся визуальный образ или ассоциацию для правильного ответа, но используй смешной и абсурдный только в мнемоническом образе.  
-
-        КОНТЕКСТ:  
-        - Вопрос: {question_text}  
-        - Ответ студента (неправильно): {user_ans}  
-        - Правильный ответ: {correct_ans}  
-
-        ТРЕБОВАНИЯ К ОТВЕТУ:  
-        1. Объяснение: 2-3 предложения; технически верное, объясни почему ответ к этой задаче именно такой, попытайся пользоваться сложными терминами там, где это надо, но объяснение должно быть понятно даже новичку. Делай ответ без критики.  
-        2. Мнемонический образ: Опиши смешной, забавный и запоминающийся визуальный образ (3-5 предложений), который помогает запомнить правильный ответ.  
-        3. Язык: русский.  
-        4. ОБЯЗАТЕЛЬНО верни ответ ТОЛЬКО в следующем JSON-формате, без дополнительного текста:  
-
-        {{  
-          "explanation": "Объяснение здесь...",  
-          "mnemonic_image": "Описание образа здесь..."}}"""
+        # Текст промпта без отступов: в запрос не попадают пробелы от
+        # форматирования исходного кода
+        prompt = f"""Ты — опытный тьютор, который помогает студентам учиться на их ошибках.
+
+ЗАДАЧА:
+1. Объясни кратко, но так, чтобы было понятно (2-3 предложения), почему ответ пользователя неправильный. Там, где надо, используй термины, чтобы они были уместны.
+2. Придумай абсурдный, веселый и запоминающийся визуальный образ или ассоциацию для правильного ответа, но используй смешной и абсурдный только в мнемоническом образе.
+
+КОНТЕКСТ:
+- Вопрос: {question_text}
+- Ответ студента (неправильно): {user_ans}
+- Правильный ответ: {correct_ans}
+
+ТРЕБОВАНИЯ К ОТВЕТУ:
+1. Объяснение: 2-3 предложения; технически верное, объясни почему ответ к этой задаче именно такой, попытайся пользоваться сложными терминами там, где это надо, но объяснение должно быть понятно даже новичку. Делай ответ без критики.
+2. Мнемонический образ: Опиши смешной, забавный и запоминающийся визуальный образ (3-5 предложений), который помогает запомнить правильный ответ.
+3. Язык: русский.
+4. ОБЯЗАТЕЛЬНО верни ответ ТОЛЬКО в следующем JSON-формате, без дополнительного текста:
+
+{{
+  "explanation": "Объяснение здесь...",
+  "mnemonic_image": "Описание образа здесь..."}}"""
 
         return prompt
 
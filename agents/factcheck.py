@@ -5,6 +5,27 @@ from services.gigachat_client import GigaChatClient
 
 logger = logging.getLogger(__name__)
 
+# Статичные инструкции фактчека: собираются один раз при импорте и передаются
+# системным сообщением, в запросе остаётся только список концептов
+FACTCHECK_SYSTEM_PROMPT = """ИНСТРУКЦИИ:
+1. Проверь каждый концепт на соответствие научным знаниям
+2. Если найдешь ошибку - исправь определение
+3. Если концепт корректен - оставь без изменений
+4. Сохрани оригинальную структуру терминов
+5. Не добавляй новые концепты
+
+Верни ответ в формате JSON:
+{
+    "concepts": [
+        {
+            "term": "оригинальный термин",
+            "definition": "проверенное определение"
+        }
+    ]
+}
+
+Только JSON, без дополнительного текста."""
+
 
 class FactCheckAgent:
     def __init__(self, client: GigaChatClient):
@@ -24,7 +45,7 @@ class FactCheckAgent:
 
             # Отправляем запрос к API с автоматическим парсингом JSON
             # ✅ ИСПРАВЛЕНО: Используем generate_json() вместо несуществующего send_request()
-            response_data = self.client.generate_json(prompt)
+            response_data = self.client.generate_json(prompt, system_prompt=FACTCHECK_SYSTEM_PROMPT)
 
             # Извлекаем проверенные концепты
             verified_concepts = response_data.get("concepts", [])
@@ -45,34 +66,14 @@ class FactCheckAgent:
     def _build_prompt(self, concepts: List[Dict[str, str]]) -> str:
         """Строит промпт для проверки концептов."""
 
-        concepts_list = ""
-        for i, concept in enumerate(concepts, 1):
-            term = concept.get('term', '')
-            definition = concept.get('definition', '')
-            concepts_list += f"{i}. Термин: {term}\n   Определение: {definition}\n\n"
-
-        prompt = f"""
-Проверь следующие образовательные концепты на фактические ошибки и неточности:
-
-{concepts_list}
-
-ИНСТРУКЦИИ:
-1. Проверь каждый концепт на соответствие научным знаниям
-2. Если найдешь ошибку - исправь определение
-3. Если концепт корректен - оставь без изменений
-4. Сохрани оригинальную структуру терминов
-5. Не добавляй новые концепты
-
-Верни ответ в формате JSON:
-{{
-    "concepts": [
-        {{
-            "term": "оригинальный термин",
-            "definition": "проверенное определение"
-        }}
-    ]
-}}
+        # Собираем части в список и склеиваем один раз вместо += в цикле
+        concepts_list = "".join(
+            f"{i}. Термин: {concept.get('term', '')}\n   Определение: {concept.get('definition', '')}\n\n"
+            for i, concept in enumerate(concepts, 1)
+        )
 
-Только JSON, без дополнительного текста.
-"""
+        prompt = (
+            "Проверь следующие образовательные концепты на фактические ошибки и неточности:\n\n"
+            f"{concepts_list}"
+        )
         return prompt
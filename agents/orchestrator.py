@@ -163,7 +163,7 @@ class OrchestratorAgent:
                 logger.info("\n>>> CALLING ParserAgent.parse_note()")
                 self._log_data_transfer("Orchestrator", "ParserAgent", note_text, "note_text")
 
-                extracted = self.parser.parse_note(note_text)
+                extracted = self.parser.parse_note(note_text, note_hash=self.current_note_hash)
 
                 self._log_data_transfer("ParserAgent", "Orchestrator", extracted, "extracted_concepts")
 
@@ -428,15 +428,19 @@ class OrchestratorAgent:
         logger.info(f"\n📤 DATA TRANSFER: {source} → {destination}")
         logger.info(f"   Data type: {data_name}")
 
+        # Превью нужно только в DEBUG: не сериализуем весь объект впустую
+        debug_enabled = logger.isEnabledFor(logging.DEBUG)
+
         if isinstance(data, (list, tuple)):
             logger.info(f"   Data size: {len(data)} items")
-            if len(data) > 0 and len(data) <= 5:
-                logger.debug(f"   Data preview: {json.dumps(data, ensure_ascii=False, indent=2)[:200]}...")
+            if debug_enabled and 0 < len(data) <= 5:
+                logger.debug("   Data preview: %.200s...", json.dumps(data, ensure_ascii=False, indent=2))
         elif isinstance(data, dict):
             logger.info(f"   Data keys: {list(data.keys())}")
-            logger.debug(f"   Data preview: {json.dumps(data, ensure_ascii=False, indent=2)[:200]}...")
+            if debug_enabled:
+                logger.debug("   Data preview: %.200s...", json.dumps(data, ensure_ascii=False, indent=2))
         elif isinstance(data, str):
             logger.info(f"   Data length: {len(data)} chars")
-            logger.debug(f"   Data preview: '{data[:100]}...'")
+            logger.debug("   Data preview: '%.100s...'", data)
         else:
             logger.info(f"   Data type: {type(data)}")
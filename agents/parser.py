@@ -1,9 +1,71 @@
 from services.gigachat_client import GigaChatClient
 from services.cache_manager import CacheManager
 from utils.hashing import compute_hash
+from typing import Optional
 import logging
 
 logger = logging.getLogger(__name__)
+
+# Инструкции и few-shot примеры для извлечения концептов. Строка собирается один
+# раз при импорте и передаётся системным сообщением без подстановок, поэтому
+# префикс запроса одинаков для всех заметок.
+PARSER_SYSTEM_PROMPT = (
+    "Вы — интеллектуальный помощник-методист с глубокими знаниями в образовательных дисциплинах. "
+    "Ваша задача — извлечь из учебной заметки ключевые концепты и составить для каждого максимально полное и полезное определение.\n\n"
+
+    "ВАЖНО: Определение должно быть самодостаточным и образовательно ценным. Это означает:\n"
+    "1. Если в тексте явно указаны свойства, характеристики или связи концепта — обязательно включите их в определение.\n"
+    "2. Если в тексте указано только базовое определение БЕЗ свойств и связей — вы должны:\n"
+    "   • Дополнить определение общеизвестными ключевыми свойствами концепта (из вашей базы знаний).\n"
+    "   • Добавить 2-3 самых важных связи с другими релевантными понятиями (которые студент должен знать).\n"
+    "   • Использовать только проверенные, общепринятые в науке факты — никаких домыслов.\n"
+    "3. Если свойства и связи частично упомянуты в тексте — дополните их недостающими важными деталями для полноты картины.\n\n"
+
+    "Структура определения (всё в одном поле definition):\n"
+    "— Начните с чёткой формулировки понятия.\n"
+    "— Далее перечислите ключевые свойства и характеристики (из текста + ваши дополнения, если необходимо).\n"
+    "— Завершите описанием важнейших связей с другими концептами (противопоставление, использование, следствие, примеры и т.д.).\n\n"
+
+    "Примеры правильного подхода:\n\n"
+
+    "Пример 1 (в тексте только определение):\n"
+    "Исходный текст: «Фотосинтез — процесс преобразования света в энергию».\n"
+    "Ваш вывод:\n"
+    "{\n"
+    "  \"term\": \"Фотосинтез\",\n"
+    "  \"definition\": \"Фотосинтез — биохимический процесс, при котором растения и некоторые бактерии преобразуют световую энергию в химическую. "
+    "Происходит в хлоропластах с участием хлорофилла, требует воды и углекислого газа, выделяет кислород как побочный продукт. "
+    "Противоположен процессу дыхания (окисление органики), является основой пищевых цепей в экосистемах и источником атмосферного кислорода.\"\n"
+    "}\n\n"
+
+    "Пример 2 (в тексте есть свойства, но нет связей):\n"
+    "Исходный текст: «Хлорофилл — зелёный пигмент, поглощает свет».\n"
+    "Ваш вывод:\n"
+    "{\n"
+    "  \"term\": \"Хлорофилл\",\n"
+    "  \"definition\": \"Хлорофилл — зелёный пигмент, находящийся в хлоропластах растений, поглощает преимущественно красный и синий свет, "
+    "отражает зелёный (отсюда цвет растений). Является ключевым компонентом фотосинтеза, без него невозможно преобразование световой энергии. "
+    "Существует несколько типов (хлорофилл a, b), различающихся по спектру поглощения.\"\n"
+    "}\n\n"
+
+    "Пример 3 (в тексте полная информация):\n"
+    "Исходный текст: «Митохондрии — органеллы клетки, производят АТФ, имеют двойную мембрану, содержат собственную ДНК, участвуют в дыхании».\n"
+    "Ваш вывод:\n"
+    "{\n"
+    "  \"term\": \"Митохондрии\",\n"
+    "  \"definition\": \"Митохондрии — органеллы эукариотических клеток, отвечающие за производство АТФ (энергетической валюты клетки). "
+    "Имеют двойную мембрану, содержат собственную кольцевую ДНК (что указывает на симбиотическое происхождение), участвуют в процессе клеточного дыхания. "
+    "Тесно связаны с процессом окисления глюкозы и цикла Кребса, противоположны хлоропластам по функции (митохондрии расходуют кислород, хлоропласты его производят).\"\n"
+    "}\n\n"
+
+    "Формат вывода:\n"
+    "— JSON-список словарей с полями term и definition.\n"
+    "— Не используйте Markdown-блоки, вводные комментарии или пояснения.\n"
+    "— Строго следуйте формату для автоматической обработки.\n"
+    "— Выделяйте только значимые концепты из текста, не добавляйте термины, которых там нет."
+)
+
+
 class ParserAgent:
     def __init__(self, client: GigaChatClient, cache_manager: CacheManager, cache_enabled: bool = True):
         """
@@ -15,16 +77,21 @@ class ParserAgent:
         self.cache_manager = cache_manager
         self.cache_enabled = cache_enabled
 
-    def parse_note(self, text: str) -> list:
+    def parse_note(self, text: str, note_hash: Optional[str] = None) -> list:
         """
         Принимает сырой текст заметки.
-        1. Вычисляет хеш.
+        1. Вычисляет хеш (если он не передан вызывающей стороной).
         2. Проверяет и при необходимости читает кэш.
         3. Если нет кэша — вызывает LLM для извлечения концептов.
         4. Сохраняет результат в кэш при необходимости.
         5. Возвращает список концептов (list of dict).
+
+        :param text: Текст заметки
+        :param note_hash: Уже вычисленный compute_hash(text) — позволяет
+                          не хешировать длинную заметку повторно
         """
-        note_hash = compute_hash(text)
+        if note_hash is None:
+            note_hash = compute_hash(text)
         if self.cache_enabled:
             cached = self.cache_manager.get(note_hash)
             if cached is not None:
@@ -44,66 +111,9 @@ class ParserAgent:
         """
         Формирует промпт, отправляет в GigaChat, возвращает список концептов.
         """
-        prompt = (
-            "Вы — интеллектуальный помощник-методист с глубокими знаниями в образовательных дисциплинах. "
-            "Ваша задача — извлечь из учебной заметки ключевые концепты и составить для каждого максимально полное и полезное определение.\n\n"
-
-            "ВАЖНО: Определение должно быть самодостаточным и образовательно ценным. Это означает:\n"
-            "1. Если в тексте явно указаны свойства, характеристики или связи концепта — обязательно включите их в определение.\n"
-            "2. Если в тексте указано только базовое определение БЕЗ свойств и связей — вы должны:\n"
-            "   • Дополнить определение общеизвестными ключевыми свойствами концепта (из вашей базы знаний).\n"
-            "   • Добавить 2-3 самых важных связи с другими релевантными понятиями (которые студент должен знать).\n"
-            "   • Использовать только проверенные, общепринятые в науке факты — никаких домыслов.\n"
-            "3. Если свойства и связи частично упомянуты в тексте — дополните их недостающими важными деталями для полноты картины.\n\n"
-
-            "Структура определения (всё в одном поле definition):\n"
-            "— Начните с чёткой формулировки понятия.\n"
-            "— Далее перечислите ключевые свойства и характеристики (из текста + ваши дополнения, если необходимо).\n"
-            "— Завершите описанием важнейших связей с другими концептами (противопоставление, использование, следствие, примеры и т.д.).\n\n"
-
-            "Примеры правильного подхода:\n\n"
-
-            "Пример 1 (в тексте только определение):\n"
-            "Исходный текст: «Фотосинтез — процесс преобразования света в энергию».\n"
-            "Ваш вывод:\n"
-            "{\n"
-            "  \"term\": \"Фотосинтез\",\n"
-            "  \"definition\": \"Фотосинтез — биохимический процесс, при котором растения и некоторые бактерии преобразуют световую энергию в химическую. "
-            "Происходит в хлоропластах с участием хлорофилла, требует воды и углекислого газа, выделяет кислород как побочный продукт. "
-            "Противоположен процессу дыхания (окисление органики), является основой пищевых цепей в экосистемах и источником атмосферного кислорода.\"\n"
-            "}\n\n"
-
-            "Пример 2 (в тексте есть свойства, но нет связей):\n"
-            "Исходный текст: «Хлорофилл — зелёный пигмент, поглощает свет».\n"
-            "Ваш вывод:\n"
-            "{\n"
-            "  \"term\": \"Хлорофилл\",\n"
-            "  \"definition\": \"Хлорофилл — зелёный пигмент, находящийся в хлоропластах растений, поглощает преимущественно красный и синий свет, "
-            "отражает зелёный (отсюда цвет растений). Является ключевым компонентом фотосинтеза, без него невозможно преобразование световой энергии. "
-            "Существует несколько типов (хлорофилл a, b), различающихся по спектру поглощения.\"\n"
-            "}\n\n"
-
-            "Пример 3 (в тексте полная информация):\n"
-            "Исходный текст: «Митохондрии — органеллы клетки, производят АТФ, имеют двойную мембрану, содержат собственную ДНК, участвуют в дыхании».\n"
-            "Ваш вывод:\n"
-            "{\n"
-            "  \"term\": \"Митохондрии\",\n"
-            "  \"definition\": \"Митохондрии — органеллы эукариотических клеток, отвечающие за производство АТФ (энергетической валюты клетки). "
-            "Имеют двойную мембрану, содержат собственную кольцевую ДНК (что указывает на симбиотическое происхождение), участвуют в процессе клеточного дыхания. "
-            "Тесно связаны с процессом окисления глюкозы и цикла Кребса, противоположны хлоропластам по функции (митохондрии расходуют кислород, хлоропласты его производят).\"\n"
-            "}\n\n"
-
-            "Формат вывода:\n"
-            "— JSON-список словарей с полями term и definition.\n"
-            "— Не используйте Markdown-блоки, вводные комментарии или пояснения.\n"
-            "— Строго следуйте формату для автоматической обработки.\n"
-            "— Выделяйте только значимые концепты из текста, не добавляйте термины, которых там нет.\n\n"
-
-            "Текст заметки:\n"
-            f"{text}"
-        )
-
-        result = self.client.generate_json(prompt)
+        prompt = f"Текст заметки:\n{text}"
+
+        result = self.client.generate_json(prompt, system_prompt=PARSER_SYSTEM_PROMPT)
         # Опционально: валидация структуры результата здесь
         if not isinstance(result, list):
             raise ValueError("GigaChat вернул неожиданный формат (ожидается список концептов)")
@@ -1,14 +1,79 @@
 # agents/quiz.py
 
 
+from itertools import islice
 from typing import List, Dict, Set, Any
 from services.gigachat_client import GigaChatClient
 import uuid
 import json
 import logging
+import re
 
 logger = logging.getLogger(__name__)
 
+# Системный промпт квиза. Не содержит runtime-значений, поэтому префикс запроса
+# побайтно одинаков между вызовами и может переиспользоваться кэшем префикса API.
+QUIZ_SYSTEM_PROMPT = (
+    "Ты — генератор учебных вопросов для интеллектуальной системы квизов. "
+    "Генерируй уникальные образовательные вопросы на основе концептов из запроса пользователя.\n\n"
+
+    "Типы вопросов (80% multiple_choice, 20% true_false):\n"
+    "1. multiple_choice: 4-6 вариантов ответа\n"
+    "2. true_false: вопрос с ответом True/False\n\n"
+
+    "Сложность:\n"
+    "- в случае автоматической сложности для каждого вопроса постарайся, чтобы 50% - высокая сложность (hard), "
+    "30% - средняя сложность (medium), 20% - легкая сложность (easy)\n"
+    "Для каждого вопроса самостоятельно назначь уровень difficulty на основе:\n"
+    "- Абстрактность концепта (факт = easy, принцип = medium, теория = hard)\n"
+    "- Когнитивная нагрузка (вспомнить = easy, понять = medium, применить = hard)\n"
+    "- Количество шагов рассуждения (один = easy, несколько = medium/hard)\n\n"
+
+    "Требования:\n"
+    "- Каждый вопрос ОБЯЗАТЕЛЬНО должен быть связан с одним концептом из списка\n"
+    "- Если концепт глубокий, содержащий много информации и позволяет на своей основе составить "
+    "несколько нетривиальных уникальных вопросов, можно использовать его несколько раз\n"
+    "- Вопросы проверяют понимание, а не запоминание\n"
+    "- Дистракторы (неправильные варианты в multiple_choice) должны быть правдоподобны "
+    "и не вызывать сомнений своей искусственностью\n"
+    "- Избегай слов \"всегда\", \"никогда\" и другие универсальные утверждения\n\n"
+
+    "СТРОГИЙ формат JSON (массив объектов):\n\n"
+    "[\n"
+    "  {\n"
+    "    \"question\": \"Текст вопроса (макс 180 символов)\",\n"
+    "    \"type\": \"multiple_choice\",\n"
+    "    \"options\": [\"Вариант1\", \"Вариант2\", ...] для multiple_choice,\n"
+    "    \"related_concept\": \"конкретный концепт из списка концептов, на котором базируется вопрос\",\n"
+    "    \"correct_answer\": \"Вариант1\"\n"
+    "  },\n"
+    "  {\n"
+    "    \"question\": \"Текст вопроса-утверждения\",\n"
+    "    \"type\": \"true_false\",\n"
+    "    \"options\": [\"True\", \"False\"],\n"
+    "    \"related_concept\": \"конкретный концепт из списка концептов, на котором базируется вопрос\",\n"
+    "    \"correct_answer\": \"True\"\n"
+    "  }\n"
+    "]\n\n"
+
+    "КРИТИЧЕСКИ ВАЖНО:\n"
+    "- Возвращай ТОЛЬКО JSON-массив\n"
+    "- Без пояснений, комментариев, markdown разметки\n"
+    "- Проверь запятые и кавычки перед отправкой"
+)
+
+# Допустимые значения для валидации вопросов (frozenset: O(1) проверка вхождения,
+# объекты создаются один раз при импорте, а не на каждый вопрос)
+REQUIRED_QUESTION_FIELDS = ("question", "type", "correct_answer", "related_concept")
+VALID_QUESTION_TYPES = frozenset({"multiple_choice", "true_false"})
+VALID_TRUE_FALSE_ANSWERS = frozenset({"True", "False", "true", "false"})
+
+# Токенизация для сравнения вопросов: regex компилируется и стоп-слова
+# собираются один раз, а не при каждом попарном сравнении
+_WORD_RE = re.compile(r'\b\w+\b')
+_STOP_WORDS = frozenset({"как", "что", "где", "когда", "почему", "какой", "в", "на", "из", "по", "для", "с", "к"})
+
+
 class QuizAgent:
     """
     Агент-экзаменатор. Использует LLM для генерации уникальных вопросов по концептам.
@@ -57,8 +122,12 @@ class QuizAgent:
         ]
         """
         logger.info("[START] QuizAgent.generate_questions called")
-        logger.debug(f"[INPUT] concepts:\n{json.dumps(concepts, ensure_ascii=False, indent=2)}")
-        logger.debug(f"[INPUT] avoid_history:\n{json.dumps(list(avoid_history), ensure_ascii=False, indent=2)}")
+        # Полные JSON-дампы строим только в DEBUG: иначе f-string сериализует
+        # все концепты и всю историю впустую, даже если уровень отфильтрует запись
+        debug_enabled = logger.isEnabledFor(logging.DEBUG)
+        if debug_enabled:
+            logger.debug("[INPUT] concepts:\n%s", json.dumps(concepts, ensure_ascii=False, indent=2))
+            logger.debug("[INPUT] avoid_history:\n%s", json.dumps(list(avoid_history), ensure_ascii=False, indent=2))
 
         prompt = self._questions_prompt(concepts, avoid_history)
 
@@ -69,7 +138,7 @@ class QuizAgent:
 
         # Шаг 1: Получение JSON от LLM (с обработкой ошибок)
         try:
-            raw_questions = self.client.generate_json(prompt)
+            raw_questions = self.client.generate_json(prompt, system_prompt=QUIZ_SYSTEM_PROMPT)
             logger.debug(
                 f"[STEP] Received {len(raw_questions) if isinstance(raw_questions, list) else 'N/A'} raw questions from LLM")
         except ValueError as e:
@@ -84,13 +153,17 @@ class QuizAgent:
 
         # Шаг 3: Проверка уникальности
         valid_questions = self._validate_unique(valid_and_filtered_questions, avoid_history)
-        logger.debug(f"[STEP] After validation, valid_questions:\n{json.dumps(valid_questions, ensure_ascii=False, indent=2)}")
+        if debug_enabled:
+            logger.debug("[STEP] After validation, valid_questions:\n%s",
+                         json.dumps(valid_questions, ensure_ascii=False, indent=2))
 
         # Шаг 4: Постобработка (добавление UUID, concept_definition)
         processed_questions = self._post_process_questions(valid_questions, concepts)
         logger.info("[FINISH] QuizAgent.generate_questions finished")
         logger.info(f"[FINISH] Returning {len(processed_questions)} questions")
-        logger.debug(f"[OUTPUT] processed_questions:\n{json.dumps(processed_questions, ensure_ascii=False, indent=2)}")
+        if debug_enabled:
+            logger.debug("[OUTPUT] processed_questions:\n%s",
+                         json.dumps(processed_questions, ensure_ascii=False, indent=2))
 
         # ДОБАВИТЬ логирование для диагностики
         if len(processed_questions) < self.questions_count:
@@ -113,7 +186,8 @@ class QuizAgent:
             avoid_history: Set[str]
     ) -> str:
         """
-        Собирает системный промпт для LLM.
+        Собирает пользовательскую (изменяемую) часть промпта для LLM.
+        Статичные инструкции передаются отдельно через QUIZ_SYSTEM_PROMPT.
         :param concepts: Список концептов [{ "term":..., "definition":...}]
         :param avoid_history: Множество текстов/хешей ранее сгенерированных вопросов
         :return: Строка-промпт
@@ -129,11 +203,12 @@ class QuizAgent:
 
         avoid_part = ""
         if avoid_history:
-            # Ограничиваем до 15 последних вопросов
-            recent_history = list(avoid_history)[-15:]
+            # Ограничиваем до 15 вопросов. Множество не упорядочено, поэтому берём
+            # первые 15 без копирования всей истории в список
+            recent_history = islice(avoid_history, 15)
             avoid_part = (
-                    "НЕ создавай вопросы, похожие на эти:\n"
-                    + "\n".join([f"- {q}" for q in recent_history])
+                    "\n\nНЕ создавай вопросы, похожие на эти (сравнивай по смыслу, теме и структуре!):\n"
+                    + "\n".join(f"- {q}" for q in recent_history)
             )
 
         concept_part = "\n".join([
@@ -193,52 +268,14 @@ class QuizAgent:
         #     "— Вопросы должны быть максимально информативны для учебного теста.\n"
         # )
 
-        prompt = ( f"""Ты — генератор учебных вопросов для интеллектуальной системы квизов. Сгенерируй {self.questions_count} уникальных образовательных вопросов уровня сложности '{self.difficulty}' на основе концептов:
-            {concept_part}
-            
-            Типы вопросов (80% multiple_choice, 20% true_false):
-            1. multiple_choice: 4-6 вариантов ответа
-            2. true_false: вопрос с ответом True/False
-            
-            Сложность:
-            - в случае автоматической сложности для каждого вопроса постарайся, чтобы 50% - высокая сложность (hard), 30% - средняя сложность (medium), 20% - легкая сложность (easy)
-            Для каждого вопроса самостоятельно назначь уровень difficulty на основе:
-            - Абстрактность концепта (факт = easy, принцип = medium, теория = hard)
-            - Когнитивная нагрузка (вспомнить = easy, понять = medium, применить = hard)
-            - Количество шагов рассуждения (один = easy, несколько = medium/hard)      
-            
-            Требования:
-            - Каждый вопрос ОБЯЗАТЕЛЬНО должел быть связан с одним концептом из списка
-            - Если концепт глубокий, содержащий много информации и позволяет на своей основе составить несколько нетривиальных уникальных вопросов, можно использовать его несколько раз
-            - Вопросы проверяют понимание, а не запоминание
-            - Дистракторы (неправильные варианты в multiple_choice) должны быть правдоподобны и не вызывать сомнений своей искусственностью
-            - Избегай слов "всегда", "никогда" и другие универсальные утверждения
-            - НЕ создавай вопросы, похожие на эти (сравнивай по смыслу, теме и структуре!):
-            {avoid_part}
-            
-            СТРОГИЙ формат JSON (массив объектов):
-            
-            [
-              {{
-                "question": "Текст вопроса (макс 180 символов)",
-                "type": "multiple_choice",
-                "options": ["Вариант1", "Вариант2", ...] для multiple_choice,
-                "related_concept": "конкретный концепт из списка концептов, на котором базируется вопрос",
-                "correct_answer": "Вариант1" 
-              }},
-              {{
-                "question": "Текст вопроса-утверждения",
-                "type": "true_false",
-                "options": ["True", "False"],
-                "related_concept": "конкретный концепт из списка концептов, на котором базируется вопрос"
-                "correct_answer": "True"
-              }}
-            ]
-            
-            КРИТИЧЕСКИ ВАЖНО: 
-            - Возвращай ТОЛЬКО JSON-массив
-            - Без пояснений, комментариев, markdown разметки
-            - Проверь запятые и кавычки перед отправкой"""
+        # Статичные инструкции вынесены в QUIZ_SYSTEM_PROMPT, здесь — только данные запроса
+        prompt = (
+            f"Сгенерируй {self.questions_count} уникальных образовательных вопросов "
+            f"уровня сложности '{self.difficulty}' на основе концептов:\n"
+            f"{concept_part}"
+            # Блок истории добавляется только если она не пуста: без пустого
+            # требования и дублирующегося заголовка в каждом запросе
+            f"{avoid_part}"
         )
 
         logger.info(f"[STEP] Prompt ready")
@@ -281,16 +318,15 @@ class QuizAgent:
         :return: True если структура корректна, False иначе
         """
         # Проверка обязательных полей
-        required_fields = ["question", "type", "correct_answer", "related_concept"]
-        for field in required_fields:
+        for field in REQUIRED_QUESTION_FIELDS:
             if field not in q or not q[field]:
                 logger.warning(f"[VALIDATION] Missing or empty required field '{field}': {q}")
                 return False
 
         # Проверка допустимых типов вопросов
-        valid_types = ["multiple_choice", "true_false"]
-        if q["type"] not in valid_types:
-            logger.warning(f"[VALIDATION] Invalid question type '{q['type']}'. Expected: {valid_types}")
+        if not isinstance(q["type"], str) or q["type"] not in VALID_QUESTION_TYPES:
+            logger.warning(
+                f"[VALIDATION] Invalid question type '{q['type']}'. Expected: {sorted(VALID_QUESTION_TYPES)}")
             return False
 
         # Валидация для multiple_choice
@@ -309,8 +345,8 @@ class QuizAgent:
 
         # Валидация для true_false
         if q["type"] == "true_false":
-            valid_answers = ["True", "False", "true", "false"]
-            if q["correct_answer"] not in valid_answers:
+            answer = q["correct_answer"]
+            if not isinstance(answer, str) or answer not in VALID_TRUE_FALSE_ANSWERS:
                 logger.warning(
                     f"[VALIDATION] true_false correct_answer must be True/False, got: '{q['correct_answer']}'")
                 return False
@@ -338,7 +374,9 @@ class QuizAgent:
 
         unique = []
         seen_exact = set(history)  # Для точного совпадения
-        seen_texts = list(history)  # Для семантического сравнения
+        # Для семантического сравнения: токенизируем историю один раз,
+        # а не заново при каждом сравнении с новым вопросом
+        seen_tokens = [(seen_text, self._tokenize(seen_text)) for seen_text in history]
 
         for idx, q in enumerate(questions):
             text = q.get("question", "").strip()
@@ -353,55 +391,42 @@ class QuizAgent:
                 logger.info(f"[SKIP] Question #{idx + 1}: exact duplicate")
                 continue
 
-            # Проверка 2: Семантическое совпадение
-            is_duplicate = False
-            for seen_text in seen_texts:
-                if self._is_semantically_similar(text, seen_text):
-                    logger.info(f"[SKIP] Question #{idx + 1}: semantically similar to existing")
-                    is_duplicate = True
-                    break
-
-            if is_duplicate:
+            # Проверка 2: Семантическое совпадение (next() останавливается на первом совпадении)
+            tokens = self._tokenize(text)
+            similar_to = next(
+                (seen_text for seen_text, seen in seen_tokens if self._are_tokens_similar(tokens, seen)),
+                None
+            )
+            if similar_to is not None:
+                logger.debug("[SIMILARITY] '%.50s...' ~ '%.50s...'", text, similar_to)
+                logger.info(f"[SKIP] Question #{idx + 1}: semantically similar to existing")
                 continue
 
             # Вопрос уникален
             unique.append(q)
             seen_exact.add(text_lower)
-            seen_texts.append(text)
+            seen_tokens.append((text, tokens))
             logger.debug(f"[VALID] Question #{idx + 1} added as unique")
 
         logger.info(f"[STEP] {len(unique)}/{len(questions)} questions passed uniqueness check")
         return unique
 
 
-    def _is_semantically_similar(
-            self,
-            q1: str,
-            q2: str,
+    @staticmethod
+    def _are_tokens_similar(
+            words1: Set[str],
+            words2: Set[str],
             threshold: float = 0.7
     ) -> bool:
         """
-        Проверяет семантическую похожесть вопросов через коэффициент Жаккара.
+        Проверяет семантическую похожесть заранее токенизированных вопросов
+        через коэффициент Жаккара.
 
-        :param q1: Первый вопрос
-        :param q2: Второй вопрос
+        :param words1: Слова первого вопроса (результат _tokenize)
+        :param words2: Слова второго вопроса (результат _tokenize)
         :param threshold: Порог похожести (0.7 = 70% совпадающих слов)
         :return: True если вопросы похожи
         """
-        # Удаляем стоп-слова и знаки препинания
-        import re
-        stop_words = {"как", "что", "где", "когда", "почему", "какой", "в", "на", "из", "по", "для", "с", "к"}
-
-        # Токенизация и очистка
-        def tokenize(text: str) -> Set[str]:
-            # Убираем знаки препинания, приводим к нижнему регистру
-            words = re.findall(r'\b\w+\b', text.lower())
-            # Фильтруем стоп-слова и короткие слова
-            return set(w for w in words if w not in stop_words and len(w) > 2)
-
-        words1 = tokenize(q1)
-        words2 = tokenize(q2)
-
         if not words1 or not words2:
             return False
 
@@ -412,11 +437,20 @@ class QuizAgent:
         if union == 0:
             return False
 
-        similarity = intersection / union
+        return intersection / union >= threshold
 
-        logger.debug(f"[SIMILARITY] {similarity:.2f} between:\n  '{q1[:50]}...'\n  '{q2[:50]}...'")
+    @staticmethod
+    def _tokenize(text: str) -> Set[str]:
+        """
+        Разбивает текст вопроса на значимые слова для коэффициента Жаккара.
 
-        return similarity >= threshold
+        :param text: Текст вопроса
+        :return: Множество слов без стоп-слов и коротких слов
+        """
+        # Убираем знаки препинания, приводим к нижнему регистру
+        words = _WORD_RE.findall(text.lower())
+        # Фильтруем стоп-слова и короткие слова
+        return {w for w in words if w not in _STOP_WORDS and len(w) > 2}
 
     def _post_process_questions(
             self,
@@ -433,17 +467,21 @@ class QuizAgent:
         logger.info("[STEP] Post-processing questions (assigning UUIDs, concept_definition)")
 
         concept_lookup = {c["term"]: c["definition"] for c in concepts}
+        debug_enabled = logger.isEnabledFor(logging.DEBUG)
 
         for idx, q in enumerate(questions):
-            original = q.copy()
+            # Копия нужна только для DEBUG-лога "до/после"
+            original = q.copy() if debug_enabled else None
             q["question_id"] = str(uuid.uuid4())
             related = q.get("related_concept") or ""
             q["concept_definition"] = concept_lookup.get(related, "")
-            logger.debug(
-                f"[UPDATE] Processed question #{idx + 1}:\n"
-                f"[ORIGINAL] {json.dumps(original, ensure_ascii=False, indent=2)}\n"
-                f"[UPDATED]  {json.dumps(q, ensure_ascii=False, indent=2)}"
-            )
+            if debug_enabled:
+                logger.debug(
+                    "[UPDATE] Processed question #%d:\n[ORIGINAL] %s\n[UPDATED]  %s",
+                    idx + 1,
+                    json.dumps(original, ensure_ascii=False, indent=2),
+                    json.dumps(q, ensure_ascii=False, indent=2)
+                )
 
         logger.info(f"[STEP] Post-processing complete: {len(questions)} questions processed")
         return questions
@@ -318,7 +318,8 @@ def main():
         with open(file_path, 'r', encoding='utf-8') as f:
             note_text = f.read()
 
-        if not note_text.strip():
+        # isspace() проверяет пустоту без создания урезанной копии всего текста
+        if not note_text or note_text.isspace():
             print("❌ Файл пуст.")
             sys.exit(1)
 
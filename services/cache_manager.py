@@ -108,9 +108,13 @@ class CacheManager:
             # Создаем директорию если не существует
             self._ensure_cache_directory()
 
+            # Сериализуем целиком заранее: одна запись вместо множества мелких
+            # write() от json.dump, и при ошибке сериализации файл не обрезается
+            payload = json.dumps(data, ensure_ascii=False, indent=2)
+
             # Сохраняем с красивым форматированием для отладки
             with open(filepath, 'w', encoding='utf-8') as f:
-                json.dump(data, f, ensure_ascii=False, indent=2)
+                f.write(payload)
 
             logger.info(f"Cache saved successfully: {filename} ({self._get_file_size(filepath)})")
             return True
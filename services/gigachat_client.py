@@ -1,5 +1,6 @@
+from langchain_core.messages import HumanMessage, SystemMessage
 from langchain_gigachat import GigaChat
-from typing import Any, Dict, List, Union
+from typing import Any, Dict, List, Optional, Union
 import json
 import logging
 import re
@@ -7,6 +8,16 @@ import re
 
 logger = logging.getLogger(__name__)
 
+# Markdown-блок кода (```json ... ``` или ``` ... ```) вокруг JSON
+_MD_BLOCK_RE = re.compile(r'```(?:json)?\s*(.*?)\s*```', re.DOTALL)
+
+# Комментарии, которые модель иногда вставляет в JSON (// ... и /* ... */)
+_LINE_COMMENT_RE = re.compile(r'//.*$', re.MULTILINE)
+_BLOCK_COMMENT_RE = re.compile(r'/\*.*?\*/', re.DOTALL)
+
+# Поиск JSON объекта/массива в произвольном тексте ответа модели
+_JSON_SPAN_RE = re.compile(r'(\{[\s\S]*\}|\[[\s\S]*\])')
+
 
 class GigaChatClient:
     """
@@ -62,13 +73,16 @@ class GigaChatClient:
         self.total_completion_tokens: int = 0
         self.total_requests: int = 0
 
-    def generate(self, prompt: str) -> str:
+    def generate(self, prompt: str, system_prompt: Optional[str] = None) -> str:
         """
         Универсальный метод для получения текстового результата (RAW STRING).
         Используется для свободной генерации текста без структурированного формата.
 
         Args:
             prompt: Текст промпта для модели
+            system_prompt: Статичные инструкции, отправляемые отдельным системным
+                сообщением. Неизменный префикс позволяет API переиспользовать
+                кэш префикса между запросами.
 
         Returns:
             str: Сгенерированный текст от модели
@@ -80,10 +94,16 @@ class GigaChatClient:
             raise ValueError("Prompt cannot be empty")
 
         try:
-            logger.debug(f"Generating text response (prompt length: {len(prompt)} chars)")
+            logger.debug("Generating text response (prompt length: %d chars)", len(prompt))
 
             # Вызов модели через LangChain
-            response = self.gigachat.invoke(prompt)
+            if system_prompt:
+                response = self.gigachat.invoke([
+                    SystemMessage(content=system_prompt),
+                    HumanMessage(content=prompt)
+                ])
+            else:
+                response = self.gigachat.invoke(prompt)
 
             # Извлечение текста из ответа
             if hasattr(response, 'content'):
@@ -91,10 +111,16 @@ class GigaChatClient:
             else:
                 result_text = str(response)
 
-            # Обновление статистики
-            self._update_stats(prompt, result_text)
+            # Обновление статистики (точные значения из ответа API, если они есть)
+            # Передаются только длины: склеивать системный промпт с заметкой
+            # ради оценки токенов не нужно
+            self._update_stats(
+                len(system_prompt or "") + len(prompt),
+                len(result_text),
+                usage=self._extract_usage(response)
+            )
 
-            logger.debug(f"Text generation successful (response length: {len(result_text)} chars)")
+            logger.debug("Text generation successful (response length: %d chars)", len(result_text))
 
             return result_text
 
@@ -105,7 +131,8 @@ class GigaChatClient:
     def generate_json(
             self,
             prompt: str,
-            retry_attempts: int = 3
+            retry_attempts: int = 3,
+            system_prompt: Optional[str] = None
     ) -> Union[Dict[str, Any], List[Dict[str, Any]]]:
         """
         Запрос к GigaChat с ожиданием JSON-ответа.
@@ -114,6 +141,7 @@ class GigaChatClient:
         Args:
             prompt: Текст промпта (должен содержать инструкцию возврата JSON)
             retry_attempts: Количество попыток при ошибке парсинга
+            system_prompt: Статичные системные инструкции (см. generate())
 
         Returns:
             Union[Dict, List[Dict]]: Распарсенный JSON-объект
@@ -129,23 +157,25 @@ class GigaChatClient:
 
         for attempt in range(1, retry_attempts + 1):
             try:
-                logger.debug(f"Generating JSON response (attempt {attempt}/{retry_attempts})")
+                logger.debug("Generating JSON response (attempt %d/%d)", attempt, retry_attempts)
 
                 # Получение сырого текста
-                raw_response = self.generate(prompt)
+                raw_response = self.generate(prompt, system_prompt=system_prompt)
 
                 # Парсинг JSON из ответа
                 parsed_json = self._parse_json_from_text(raw_response)
 
-                logger.debug(f"JSON parsing successful on attempt {attempt}")
+                logger.debug("JSON parsing successful on attempt %d", attempt)
 
                 return parsed_json
 
             except json.JSONDecodeError as e:
                 last_error = e
+                # %-форматирование: превью ответа обрезается самим логгером,
+                # без создания среза, если запись будет отброшена
                 logger.warning(
-                    f"JSON parsing failed on attempt {attempt}: {str(e)}\n"
-                    f"Raw response preview: {raw_response[:200]}..."
+                    "JSON parsing failed on attempt %d: %s\nRaw response preview: %.200s...",
+                    attempt, e, raw_response
                 )
 
                 # Добавляем уточнение в промпт для следующей попытки
@@ -187,33 +217,75 @@ class GigaChatClient:
         self.total_requests = 0
         logger.debug("Usage stats reset")
 
-    def _update_stats(self, prompt: str, response: str) -> None:
+    @staticmethod
+    def _extract_usage(response: Any) -> Optional[Dict[str, int]]:
+        """
+        Извлечение фактического расхода токенов из ответа LangChain.
+
+        Args:
+            response: Ответ модели (AIMessage)
+
+        Returns:
+            Dict с ключами prompt_tokens/completion_tokens или None,
+            если API не вернул статистику
+        """
+        usage_metadata = getattr(response, 'usage_metadata', None)
+        if usage_metadata:
+            return {
+                "prompt_tokens": usage_metadata.get("input_tokens", 0),
+                "completion_tokens": usage_metadata.get("output_tokens", 0)
+            }
+
+        response_metadata = getattr(response, 'response_metadata', None) or {}
+        token_usage = response_metadata.get("token_usage")
+        if token_usage:
+            if not isinstance(token_usage, dict):
+                token_usage = getattr(token_usage, '__dict__', {})
+            return {
+                "prompt_tokens": token_usage.get("prompt_tokens", 0),
+                "completion_tokens": token_usage.get("completion_tokens", 0)
+            }
+
+        return None
+
+    def _update_stats(
+            self,
+            prompt_length: int,
+            response_length: int,
+            usage: Optional[Dict[str, int]] = None
+    ) -> None:
         """
         Обновление статистики токенов.
-        Приблизительная оценка на основе длины текста (1 токен ≈ 4 символа для русского).
+        Если API вернул фактический расход токенов - используется он, иначе
+        приблизительная оценка на основе длины текста (1 токен ≈ 4 символа для русского).
 
         Args:
-            prompt: Текст промпта
-            response: Текст ответа модели
+            prompt_length: Длина промпта в символах (включая системный промпт)
+            response_length: Длина ответа модели в символах
+            usage: Фактический расход токенов из ответа API (см. _extract_usage())
         """
-        # Приблизительная оценка токенов
-        # Для более точного подсчета нужен токенизатор модели
-        prompt_tokens = len(prompt) // 4
-        completion_tokens = len(response) // 4
+        if usage:
+            prompt_tokens = usage["prompt_tokens"]
+            completion_tokens = usage["completion_tokens"]
+        else:
+            # Приблизительная оценка токенов
+            # Для более точного подсчета нужен токенизатор модели
+            prompt_tokens = prompt_length // 4
+            completion_tokens = response_length // 4
 
         self.total_prompt_tokens += prompt_tokens
         self.total_completion_tokens += completion_tokens
         self.total_requests += 1
 
         logger.debug(
-            f"Stats updated: +{prompt_tokens} prompt tokens, "
-            f"+{completion_tokens} completion tokens"
+            "Stats updated: +%d prompt tokens, +%d completion tokens",
+            prompt_tokens, completion_tokens
         )
 
     def _parse_json_from_text(self, text: str) -> Union[Dict, List[Dict]]:
         """
         Извлечение и парсинг JSON из текста.
-        Модель может вернуть JSON в Markdown блоках (``````) или с комментариями.
+        Модель может вернуть JSON в Markdown блоках (```json ... ```) или с комментариями.
 
         Args:
             text: Сырой текст ответа от модели
@@ -227,31 +299,63 @@ class GigaChatClient:
         # Удаление возможных Markdown блоков
         cleaned_text = text.strip()
 
-        # Паттерн для извлечения JSON из markdown блока
-        json_block_pattern = r'``````'
-        json_match = re.search(json_block_pattern, cleaned_text)
+        # Текст, на котором json.loads уже упал: повторно его не разбираем
+        failed_text = None
+        failed_error = None
+
+        # Быстрый путь: с системным промптом модель обычно возвращает чистый JSON,
+        # и поиск markdown-блоков и комментариев регулярками не нужен
+        if cleaned_text[:1] in ('{', '[') and cleaned_text[-1:] in ('}', ']'):
+            try:
+                return json.loads(cleaned_text)
+            except json.JSONDecodeError as e:
+                failed_text, failed_error = cleaned_text, e
+
+        # Извлечение JSON из markdown блока (регулярку запускаем, только если есть ```)
+        json_match = _MD_BLOCK_RE.search(cleaned_text) if '```' in cleaned_text else None
 
         if json_match:
             cleaned_text = json_match.group(1).strip()
             logger.debug("Extracted JSON from markdown block")
 
-        # Удаление возможных комментариев (// ... или /* ... */)
-        cleaned_text = re.sub(r'//.*$', '', cleaned_text, flags=re.MULTILINE)
-        cleaned_text = re.sub(r'/\*.*?\*/', '', cleaned_text, flags=re.DOTALL)
+        # Удаление возможных комментариев (// ... или /* ... */).
+        # Без символа '/' комментариев быть не может — пропускаем оба прохода
+        if '/' in cleaned_text:
+            cleaned_text = _LINE_COMMENT_RE.sub('', cleaned_text)
+            cleaned_text = _BLOCK_COMMENT_RE.sub('', cleaned_text)
 
-        # Попытка парсинга
-        try:
-            parsed = json.loads(cleaned_text)
-            return parsed
-        except json.JSONDecodeError:
-            # Попытка найти JSON в тексте по фигурным/квадратным скобкам
-            json_pattern = r'(\{[\s\S]*\}|\[[\s\S]*\])'
-            potential_json = re.search(json_pattern, cleaned_text)
-
-            if potential_json:
-                return json.loads(potential_json.group(1))
-            else:
-                raise
+        # Попытка прямого парсинга. Текст, который не начинается с { или [,
+        # не является ожидаемым объектом/массивом — не тратим время на заведомо
+        # неудачный json.loads и построение исключения
+        if cleaned_text[:1] in ('{', '[') and cleaned_text != failed_text:
+            try:
+                return json.loads(cleaned_text)
+            except json.JSONDecodeError as e:
+                failed_text, failed_error = cleaned_text, e
+
+        # Дешёвая предпроверка: без скобок искать JSON регуляркой бессмысленно
+        if '{' not in cleaned_text and '[' not in cleaned_text:
+            # Если json.loads уже запускался — пробрасываем его настоящую ошибку
+            if failed_error is not None:
+                raise failed_error
+            raise json.JSONDecodeError("No JSON object or array found", cleaned_text, 0)
+
+        # Попытка найти JSON в тексте по фигурным/квадратным скобкам
+        potential_json = _JSON_SPAN_RE.search(cleaned_text)
+
+        if potential_json:
+            candidate = potential_json.group(1)
+            # Найденный участок совпадает с уже разобранным текстом — исход известен
+            if candidate == failed_text:
+                raise failed_error
+            return json.loads(candidate)
+
+        # Настоящая ошибка разбора (например, "Expecting ',' delimiter" у ответа,
+        # оборванного по max tokens) информативнее синтетической: именно она
+        # попадает в лог и итоговый ValueError generate_json()
+        if failed_error is not None:
+            raise failed_error
+        raise json.JSONDecodeError("No JSON object or array found", cleaned_text, 0)
 
     def _enhance_json_prompt(self, original_prompt: str) -> str:
         """
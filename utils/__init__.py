@@ -20,6 +20,8 @@
 from utils.hashing import (
     compute_hash,
     compute_short_hash,
+    compute_digest,
+    hash_file,
     hash_dict,
     hash_list,
     verify_hash,
@@ -51,6 +53,8 @@ __all__ = [
     # Функции хеширования
     "compute_hash",
     "compute_short_hash",
+    "compute_digest",
+    "hash_file",
     "hash_dict",
     "hash_list",
     "verify_hash",
@@ -83,6 +87,7 @@ __author__ = "Quiz Generator Team"
 HASHING_FUNCTIONS = [
     "compute_hash",
     "compute_short_hash",
+    "hash_file",
     "generate_cache_filename",
     "verify_hash",
 ]
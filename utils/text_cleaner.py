@@ -17,7 +17,49 @@
 
 import json
 import re
-from typing import Any, Dict, List, Optional, Union
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+
+# Регулярные выражения компилируются один раз при импорте модуля
+
+# Markdown-блок кода с опциональным указанием языка: ```json\n...```
+_RE_MD_BLOCK = re.compile(r'```(?:\w+)?\n(.*?)```', re.DOTALL)
+
+# Комментарии: /* ... */ и // ...
+_RE_BLOCK_COMMENT = re.compile(r'/\*.*?\*/', re.DOTALL)
+_RE_LINE_COMMENT = re.compile(r'//.*?$', re.MULTILINE)
+
+# Декодер для разбора JSON с произвольной позиции в тексте
+_JSON_DECODER = json.JSONDecoder()
+
+# Жадный участок JSON объекта/массива - кандидат на починку
+_RE_JSON_OBJ = re.compile(r'\{[\s\S]*\}')
+_RE_JSON_ARR = re.compile(r'\[[\s\S]*\]')
+
+# Частые ошибки JSON: trailing commas и одинарные кавычки
+_RE_TRAIL_COMMA_SQ = re.compile(r',\s*]')
+_RE_TRAIL_COMMA_CB = re.compile(r',\s*}')
+_RE_SQ_KEY = re.compile(r"'([^']*)':")
+_RE_SQ_VALUE = re.compile(r":\s*'([^']*)'")
+
+# Последовательности пробельных символов
+_RE_WHITESPACE = re.compile(r'\s+')
+
+# Пробельные символы JSON и допустимые первые символы JSON-значения
+# (включая NaN/Infinity, которые принимает json.loads)
+_JSON_WHITESPACE = ' \t\n\r'
+_JSON_START_CHARS = frozenset('{["-0123456789tfnNI')
+
+# Таблица экранирования для sanitize_for_json: обратный слеш, кавычки
+# и управляющие символы
+_JSON_ESCAPE_TABLE = str.maketrans({
+    '\\': '\\\\',
+    '"': '\\"',
+    '\n': '\\n',
+    '\r': '\\r',
+    '\t': '\\t',
+})
 
 
 def extract_json_from_markdown(text: str) -> str:
@@ -25,7 +67,7 @@ def extract_json_from_markdown(text: str) -> str:
     Извлекает JSON из текста, обернутого в markdown блоки.
 
     LLM часто возвращает JSON в формате:
-    ```
+    ```json
     { "key": "value" }
     ```
     или
@@ -40,16 +82,16 @@ def extract_json_from_markdown(text: str) -> str:
         str: Извлеченный JSON или оригинальный текст, если блок не найден
 
     Examples:
-        >>> extract_json_from_markdown('``````')
+        >>> extract_json_from_markdown('```json\\n{"a": 1}\\n```')
         '{"a": 1}'
         >>> extract_json_from_markdown('Some text {"a": 1} more text')
         'Some text {"a": 1} more text'
     """
     text = text.strip()
 
-    # Паттерн для markdown блока с опциональным указанием языка
-    pattern = r'``````'
-    match = re.search(pattern, text)
+    # Markdown блок с опциональным указанием языка (строка ``` встречается
+    # только в разметке, поэтому без неё регулярку не запускаем)
+    match = _RE_MD_BLOCK.search(text) if '```' in text else None
 
     if match:
         return match.group(1).strip()
@@ -77,11 +119,15 @@ def remove_comments(text: str) -> str:
         >>> remove_comments('{"a": /* inline */ 1}')
         '{"a":  1}'
     """
+    # Без символа '/' комментариев быть не может — оба прохода не нужны
+    if '/' not in text:
+        return text
+
     # Удаление многострочных комментариев /* ... */
-    text = re.sub(r'/\*.*?\*/', '', text, flags=re.DOTALL)
+    text = _RE_BLOCK_COMMENT.sub('', text)
 
     # Удаление однострочных комментариев // ...
-    text = re.sub(r'//.*?$', '', text, flags=re.MULTILINE)
+    text = _RE_LINE_COMMENT.sub('', text)
 
     return text
 
@@ -90,7 +136,11 @@ def extract_json_object(text: str) -> str:
     """
     Извлекает JSON объект или массив из текста.
 
-    Ищет первое вхождение {} или [] и извлекает его с учетом вложенности.
+    Объект {} имеет приоритет над массивом []: массив ищется, только если
+    в тексте нет участка от { до }. Если JSON начинается с первой скобки
+    и валиден - возвращается ровно он (см. _decode_first_json()), иначе -
+    участок от первой { (или [) до последней } (или ]), чтобы его можно было
+    попытаться починить через fix_common_json_errors().
 
     Args:
         text: Текст, содержащий JSON среди другого текста
@@ -103,14 +153,68 @@ def extract_json_object(text: str) -> str:
         '{"a": 1}'
         >>> extract_json_object('Text [1, 2, 3] end')
         '[1, 2, 3]'
+        >>> extract_json_object('Note [see below]: {"a": 1}')
+        '{"a": 1}'
+        >>> extract_json_object('{"a": [1, 2,], "b": {"c": 1}}')
+        '{"a": [1, 2,], "b": {"c": 1}}'
+    """
+    decoded = _decode_first_json(text)
+    if decoded is not None:
+        _, start, end = decoded
+        return text[start:end]
+
+    return _greedy_json_span(text)
+
+
+def _decode_first_json(text: str) -> Optional[Tuple[Any, int, int]]:
+    """
+    Разбор JSON объекта/массива, начинающегося с первой { (или [) в тексте.
+
+    Кандидаты те же, что у _greedy_json_span(): сначала первая {, если после
+    неё есть }, иначе первая [. Разбор через JSONDecoder.raw_decode (сканер
+    на C, сам учитывает строки и экранирование) и останавливается на конце
+    JSON, не захватывая прозу после него. Если кандидат не разбирается,
+    вложенные скобки не пробуются: это битый JSON, его целиком чинит
+    parse_llm_json(), а не подменяет валидный вложенный фрагмент.
+
+    Args:
+        text: Текст, содержащий JSON среди другого текста
+
+    Returns:
+        Кортеж (объект, start, end), где text[start:end] - исходный JSON,
+        или None, если JSON не найден или невалиден
+    """
+    for opener, closer in (('{', '}'), ('[', ']')):
+        start = text.find(opener)
+        if start == -1 or text.rfind(closer) < start:
+            continue
+
+        try:
+            obj, end = _JSON_DECODER.raw_decode(text, start)
+        except json.JSONDecodeError:
+            return None
+        return obj, start, end
+
+    return None
+
+
+def _greedy_json_span(text: str) -> str:
+    """
+    Участок от первой { до последней } (или от [ до ]) - кандидат на починку.
+
+    Args:
+        text: Текст, содержащий (возможно, невалидный) JSON
+
+    Returns:
+        str: Найденный участок или пустая строка
     """
     # Попытка найти JSON объект {...}
-    obj_match = re.search(r'\{[\s\S]*\}', text)
+    obj_match = _RE_JSON_OBJ.search(text)
     if obj_match:
         return obj_match.group(0)
 
     # Попытка найти JSON массив [...]
-    arr_match = re.search(r'\[[\s\S]*\]', text)
+    arr_match = _RE_JSON_ARR.search(text)
     if arr_match:
         return arr_match.group(0)
 
@@ -133,7 +237,7 @@ def clean_json_text(text: str) -> str:
         str: Очищенный текст, готовый к парсингу
 
     Examples:
-        >>> clean_json_text('``````')
+        >>> clean_json_text('```json\\n{"a": 1} // comment\\n```')
         '{"a": 1}'
     """
     # Шаг 1: Извлечь из markdown
@@ -165,10 +269,24 @@ def parse_llm_json(
         Распарсенный dict/list или None при ошибке
 
     Examples:
-        >>> parse_llm_json('``````')
+        >>> parse_llm_json('```json\\n{"a": 1}\\n```')
+        {'a': 1}
+        >>> parse_llm_json('Invalid JSON') is None
+        True
+
+        Битый JSON чинится целиком, а не подменяется вложенным фрагментом;
+        объект имеет приоритет над массивом:
+
+        >>> parse_llm_json('{"a": [1, 2,], "b": {"c": 1}}')
+        {'a': [1, 2], 'b': {'c': 1}}
+        >>> parse_llm_json('Result:\\n{"q": [1,2,], "nested": [3]}')
+        {'q': [1, 2], 'nested': [3]}
+        >>> parse_llm_json("{'a': 1, 'b': {\\"c\\": 2}}")
+        {'a': 1, 'b': {'c': 2}}
+        >>> parse_llm_json('See item [1]:\\n{"a": 1}')
+        {'a': 1}
+        >>> parse_llm_json('Ответ [JSON]:\\n{"a": 1}')
         {'a': 1}
-        >>> parse_llm_json('Invalid JSON')
-        None
     """
     if not text or not text.strip():
         return None
@@ -190,12 +308,13 @@ def parse_llm_json(
         pass
 
     # Стратегия 3: Извлечение JSON объекта из текста
-    extracted = extract_json_object(cleaned)
-    if extracted:
-        try:
-            return json.loads(extracted)
-        except json.JSONDecodeError:
-            pass
+    decoded = _decode_first_json(cleaned)
+    if decoded is not None:
+        return decoded[0]
+
+    # Участок начинается с той же скобки, что уже не разобралась в
+    # _decode_first_json(), поэтому сразу передаётся на починку
+    extracted = _greedy_json_span(cleaned)
 
     # Стратегия 4: Попытка починить распространенные ошибки
     fixed = fix_common_json_errors(extracted or cleaned)
@@ -231,13 +350,13 @@ def fix_common_json_errors(text: str) -> str:
         return text
 
     # Удаление trailing commas перед ] и }
-    text = re.sub(r',\s*]', ']', text)
-    text = re.sub(r',\s*}', '}', text)
+    text = _RE_TRAIL_COMMA_SQ.sub(']', text)
+    text = _RE_TRAIL_COMMA_CB.sub('}', text)
 
     # Замена одинарных кавычек на двойные (осторожно!)
     # Только если они явно выглядят как разделители строк
-    text = re.sub(r"'([^']*)':", r'"\1":', text)
-    text = re.sub(r":\s*'([^']*)'", r': "\1"', text)
+    text = _RE_SQ_KEY.sub(r'"\1":', text)
+    text = _RE_SQ_VALUE.sub(r': "\1"', text)
 
     return text
 
@@ -259,7 +378,7 @@ def normalize_whitespace(text: str) -> str:
         'text with spaces'
     """
     # Замена всех whitespace символов (пробелы, табы, переносы) на один пробел
-    text = re.sub(r'\s+', ' ', text)
+    text = _RE_WHITESPACE.sub(' ', text)
 
     # Удаление пробелов в начале и конце
     return text.strip()
@@ -305,18 +424,8 @@ def sanitize_for_json(text: str) -> str:
         >>> sanitize_for_json('Text with "quotes" and \\backslash')
         'Text with \\\\"quotes\\\\" and \\\\\\\\backslash'
     """
-    # Экранирование обратного слеша
-    text = text.replace('\\', '\\\\')
-
-    # Экранирование двойных кавычек
-    text = text.replace('"', '\\"')
-
-    # Экранирование управляющих символов
-    text = text.replace('\n', '\\n')
-    text = text.replace('\r', '\\r')
-    text = text.replace('\t', '\\t')
-
-    return text
+    # Все замены за один проход (вместо пяти последовательных replace)
+    return text.translate(_JSON_ESCAPE_TABLE)
 
 
 def validate_json_string(text: str) -> bool:
@@ -335,6 +444,13 @@ def validate_json_string(text: str) -> bool:
         >>> validate_json_string('invalid')
         False
     """
+    # Быстрый отказ без полного разбора: JSON-значение может начинаться
+    # только с ограниченного набора символов (свободный текст LLM отсекается сразу)
+    if isinstance(text, str):
+        stripped = text.lstrip(_JSON_WHITESPACE)
+        if not stripped or stripped[0] not in _JSON_START_CHARS:
+            return False
+
     try:
         json.loads(text)
         return True
@@ -354,19 +470,34 @@ def extract_code_blocks(text: str, language: Optional[str] = None) -> List[str]:
         List[str]: Список извлеченных блоков кода
 
     Examples:
-        >>> text = '``````\\n``````'
+        >>> text = '```python\\nprint("hi")\\n```\\n```json\\n{}\\n```'
         >>> extract_code_blocks(text, 'python')
         ['print("hi")']
     """
     if language:
-        pattern = rf'``````'
+        matches = _code_block_re(language).findall(text)
     else:
-        pattern = r'``````'
+        matches = _RE_MD_BLOCK.findall(text)
 
-    matches = re.findall(pattern, text)
     return [match.strip() for match in matches]
 
 
+@lru_cache(maxsize=16)
+def _code_block_re(language: str) -> re.Pattern:
+    """
+    Скомпилированный паттерн markdown-блока кода для конкретного языка.
+    Кэшируется: повторные вызовы extract_code_blocks() с тем же языком
+    не компилируют регулярку заново.
+
+    Args:
+        language: Язык блока (например, 'python', 'json')
+
+    Returns:
+        re.Pattern: Паттерн с одной группой - содержимым блока
+    """
+    return re.compile(rf'```{re.escape(language)}\n(.*?)```', re.DOTALL)
+
+
 # Вспомогательная функция для быстрого доступа
 def quick_parse_json(text: str) -> Optional[Union[Dict, List]]:
     """